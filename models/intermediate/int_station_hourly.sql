@@ -0,0 +1,29 @@
+{{
+    config(
+        materialized='view'
+    )
+}}
+SELECT
+  station_id,
+  hour_of_day,
+  COUNTIF(type = 'start') AS starts,
+  COUNTIF(type = 'end') AS ends
+FROM (
+  -- Union of start and end station data by hour
+  SELECT
+    start_station_id AS station_id,
+    EXTRACT(HOUR FROM start_date) AS hour_of_day,
+    'start' AS type
+  FROM
+    `london_cycles.trips`
+  UNION ALL
+  SELECT
+    end_station_id AS station_id,
+    EXTRACT(HOUR FROM end_date) AS hour_of_day,
+    'end' AS type
+  FROM
+    `london_cycles.trips`
+) AS station_hours
+GROUP BY
+  station_id,
+  hour_of_day
@@ -3,21 +3,25 @@
         materialized='view'
     )
 }}
+-- Trips are deduplicated on rental id during ingestion, so each
+-- (rental_id, type) row is already unique and plain counts suffice.
+-- A round trip (same start and end station) appears twice here but is
+-- one trip, so its 'end' row is excluded from total_traffic.
 SELECT
   station_id,
   station_name,
-  COUNT(DISTINCT CASE WHEN type = 'start' THEN rental_id END) AS total_starts,
-  COUNT(DISTINCT CASE WHEN type = 'end' THEN rental_id END) AS total_ends,
-  COUNT(DISTINCT rental_id) AS total_traffic,
-  (COUNT(DISTINCT CASE WHEN type = 'start' THEN rental_id END) - 
-   COUNT(DISTINCT CASE WHEN type = 'end' THEN rental_id END)) AS net_flow
+  COUNTIF(type = 'start') AS total_starts,
+  COUNTIF(type = 'end') AS total_ends,
+  COUNT(*) - COUNTIF(type = 'end' AND is_round_trip) AS total_traffic,
+  (COUNTIF(type = 'start') - COUNTIF(type = 'end')) AS net_flow
 FROM (
   -- Union of start and end station data
   SELECT
     rental_id,
     start_station_id AS station_id,
     start_station_name AS station_name,
-    'start' AS type
+    'start' AS type,
+    start_station_id = end_station_id AS is_round_trip
   FROM
     `london_cycles.trips`
   UNION ALL
@@ -25,7 +29,8 @@ FROM (
     rental_id,
     end_station_id AS station_id,
     end_station_name AS station_name,
-    'end' AS type
+    'end' AS type,
+    start_station_id = end_station_id AS is_round_trip
   FROM
     `london_cycles.trips`
 ) AS station_data
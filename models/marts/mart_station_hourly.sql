@@ -0,0 +1,10 @@
+{{ config(materialized='table') }}
+
+SELECT
+  station_id,
+  hour_of_day,
+  starts,
+  ends
+FROM {{ ref('int_station_hourly') }}
+ORDER BY station_id, 
+         hour_of_day
\ No newline at end of file
@@ -8,5 +8,4 @@ SELECT
   total_traffic,
   net_flow
 FROM {{ ref('int_station_popularity') }}
-ORDER BY total_traffic DESC
-LIMIT 15
\ No newline at end of file
+ORDER BY total_traffic DESC
\ No newline at end of file
@@ -0,0 +1,262 @@
+# Per-bike utilization, idle time and rebalancing index
+
+import os
+import numpy as np
+import pandas as pd
+
+from trip_cache import NAT_VALUE
+
+# Columns needed from the cleaned trips to build the index
+TRIP_COLUMNS = ['bike_id', 'start_date', 'duration_seconds', 'start_station_id', 'end_station_id']
+
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+class BikeTrajectoryIndex:
+    def __init__(self, bike_codes, start_ts, end_ts, start_station, end_station, bike_ids, station_ids):
+        """
+        Trips sorted once by (bike, start time) with int-coded ids
+
+        Use BikeTrajectoryIndex.from_trips() or from_cache() rather than
+        calling this directly.
+
+        :param bike_codes: int32 bike code per trip, sorted
+        :param start_ts: int64 start time per trip (unix seconds)
+        :param end_ts: int64 end time per trip (unix seconds)
+        :param start_station: int32 start station code per trip
+        :param end_station: int32 end station code per trip
+        :param bike_ids: Original bike id for each bike code
+        :param station_ids: Original station id for each station code
+        """
+        self.bike_codes = bike_codes
+        self.start_ts = start_ts
+        self.end_ts = end_ts
+        self.start_station = start_station
+        self.end_station = end_station
+        self.bike_ids = bike_ids
+        self.station_ids = station_ids
+
+        # Consecutive trips of the same bike form a (previous, next) pair
+        self._same_bike = bike_codes[1:] == bike_codes[:-1]
+
+    @classmethod
+    def from_trips(cls, df):
+        """
+        Build the index from a DataFrame of cleaned trips
+
+        :param df: DataFrame with at least TRIP_COLUMNS
+        :return: BikeTrajectoryIndex
+        """
+        start = pd.to_datetime(df['start_date'], errors='coerce')
+        valid = (start.notna() & df['bike_id'].notna() & (df['duration_seconds'] > 0)).to_numpy()
+        df = df[valid]
+        start = start[valid]
+
+        bike_codes, bike_ids = pd.factorize(df['bike_id'].astype(str))
+        station_codes, station_ids = pd.factorize(
+            pd.concat([df['start_station_id'], df['end_station_id']]).astype(str)
+        )
+        start_station = station_codes[:len(df)].astype(np.int32)
+        end_station = station_codes[len(df):].astype(np.int32)
+
+        start_ts = start.to_numpy(dtype='datetime64[s]').astype(np.int64)
+        end_ts = start_ts + df['duration_seconds'].to_numpy().astype(np.int64)
+        return cls._from_codes(bike_codes, start_ts, end_ts, start_station, end_station, bike_ids, station_ids)
+
+    @classmethod
+    def _from_codes(cls, bike_codes, start_ts, end_ts, start_station, end_station, bike_ids, station_ids):
+        # Single sort by (bike, start time); every later step is a linear pass
+        order = np.lexsort((start_ts, bike_codes))
+        return cls(
+            bike_codes.astype(np.int32)[order],
+            start_ts[order],
+            end_ts[order],
+            start_station.astype(np.int32)[order],
+            end_station.astype(np.int32)[order],
+            np.asarray(bike_ids),
+            np.asarray(station_ids),
+        )
+
+    @classmethod
+    def from_csv(cls, clean_csv_path):
+        """Build the index from clean_trips.csv, reading only the needed columns"""
+        df = pd.read_csv(
+            clean_csv_path,
+            usecols=TRIP_COLUMNS,
+            dtype={'bike_id': 'category', 'start_station_id': 'category', 'end_station_id': 'category'}
+        )
+        return cls.from_trips(df)
+
+    @classmethod
+    def from_cache(cls, cache):
+        """
+        Build the index from a TripCache, straight from its int codes
+
+        Only the needed columns are read and no id is decoded to a string:
+        end station codes are remapped onto the start station labels.
+
+        :param cache: TripCache holding the cleaned trips
+        :return: BikeTrajectoryIndex
+        """
+        bike_codes = np.asarray(cache.column('bike_id'))
+        start_ts = np.asarray(cache.column('start_date'))
+        duration = np.asarray(cache.column('duration_seconds'))
+        valid = (start_ts != NAT_VALUE) & (bike_codes >= 0) & (duration > 0)
+
+        # Keep only bikes with a valid trip, renumbered densely as from_trips does
+        bike_ids = cache.categories('bike_id')
+        used = np.bincount(bike_codes[valid], minlength=len(bike_ids)) > 0
+        bike_codes = (np.cumsum(used) - 1)[bike_codes[valid]]
+
+        (start_station, end_station), station_ids = cache.shared_codes(['start_station_id', 'end_station_id'])
+        start_station = start_station[valid]
+        end_station = end_station[valid]
+        # Missing stations count as one 'nan' station, like str ids in from_trips
+        missing = len(station_ids)
+        start_station = np.where(start_station < 0, missing, start_station)
+        end_station = np.where(end_station < 0, missing, end_station)
+        station_ids = station_ids.append(pd.Index(['nan'], dtype=object))
+
+        start_ts = start_ts[valid]
+        end_ts = start_ts + duration[valid].astype(np.int64)
+        return cls._from_codes(bike_codes, start_ts, end_ts, start_station, end_station, bike_ids[used], station_ids)
+
+    def __len__(self):
+        return len(self.bike_codes)
+
+    def _bike_day_keys(self):
+        # Encode (bike, day) pairs as one int64 so grouping is a single np.unique
+        day = self.start_ts // SECONDS_PER_DAY
+        first_day = int(day.min()) if len(day) else 0
+        num_days = int(day.max()) - first_day + 1 if len(day) else 1
+        key = self.bike_codes.astype(np.int64) * num_days + (day - first_day)
+        keys, inverse = np.unique(key, return_inverse=True)
+        return keys, inverse, num_days, first_day
+
+    def idle_gaps(self):
+        """
+        Idle time between consecutive trips of the same bike
+
+        :return: DataFrame with bike_id, idle_start, idle_seconds, teleport
+        """
+        idle_seconds = self.start_ts[1:] - self.end_ts[:-1]
+        teleport = self.end_station[:-1] != self.start_station[1:]
+        mask = self._same_bike
+        return pd.DataFrame({
+            'bike_id': self.bike_ids[self.bike_codes[1:][mask]],
+            'idle_start': pd.to_datetime(self.end_ts[:-1][mask], unit='s'),
+            'idle_seconds': np.maximum(idle_seconds[mask], 0),
+            'teleport': teleport[mask],
+        })
+
+    def rebalancing_moves(self):
+        """
+        Station-to-station teleports: a bike's next trip starts somewhere
+        other than where its previous trip ended, i.e. it was moved by van
+
+        :return: DataFrame with bike_id, from/to station ids and time window
+        """
+        teleport = self._same_bike & (self.end_station[:-1] != self.start_station[1:])
+        prev_idx = np.flatnonzero(teleport)
+        next_idx = prev_idx + 1
+        return pd.DataFrame({
+            'bike_id': self.bike_ids[self.bike_codes[next_idx]],
+            'from_station_id': self.station_ids[self.end_station[prev_idx]],
+            'to_station_id': self.station_ids[self.start_station[next_idx]],
+            'dropped_at': pd.to_datetime(self.end_ts[prev_idx], unit='s'),
+            'picked_up_at': pd.to_datetime(self.start_ts[next_idx], unit='s'),
+        })
+
+    def daily_utilization(self):
+        """
+        Share of each day every bike spent riding (attributed to the start day)
+
+        :return: DataFrame with bike_id, trip_date, trips, ride_seconds, utilization
+        """
+        keys, inverse, num_days, first_day = self._bike_day_keys()
+        ride_seconds = np.bincount(inverse, weights=self.end_ts - self.start_ts)
+        trips = np.bincount(inverse)
+        return pd.DataFrame({
+            'bike_id': self.bike_ids[keys // num_days],
+            'trip_date': pd.to_datetime((keys % num_days + first_day) * SECONDS_PER_DAY, unit='s').date,
+            'trips': trips,
+            'ride_seconds': ride_seconds.astype(np.int64),
+            'utilization': np.minimum(ride_seconds / SECONDS_PER_DAY, 1.0),
+        })
+
+    def bike_summary(self):
+        """
+        One row per bike with usage, idle time and rebalancing counts
+
+        :return: DataFrame indexed by bike_id
+        """
+        num_bikes = len(self.bike_ids)
+        codes = self.bike_codes
+        trips = np.bincount(codes, minlength=num_bikes)
+        ride_seconds = np.bincount(codes, weights=self.end_ts - self.start_ts, minlength=num_bikes)
+
+        # Trips are sorted by bike, so each bike's first/last trip bound its block
+        first = np.searchsorted(codes, np.arange(num_bikes), side='left')
+        last = np.searchsorted(codes, np.arange(num_bikes), side='right') - 1
+        has_trips = trips > 0
+        first_start = np.where(has_trips, self.start_ts[np.minimum(first, len(codes) - 1)], 0)
+        last_end = np.where(has_trips, self.end_ts[np.maximum(last, 0)], 0)
+        span_seconds = np.maximum(last_end - first_start, 1)
+
+        pair_bikes = codes[1:][self._same_bike]
+        idle = np.maximum(self.start_ts[1:] - self.end_ts[:-1], 0)[self._same_bike]
+        teleport = (self.end_station[:-1] != self.start_station[1:])[self._same_bike]
+        idle_total = np.bincount(pair_bikes, weights=idle, minlength=num_bikes)
+        idle_max = np.zeros(num_bikes, dtype=np.int64)
+        np.maximum.at(idle_max, pair_bikes, idle)
+        gaps = np.bincount(pair_bikes, minlength=num_bikes)
+
+        bike_days, _, num_days, _ = self._bike_day_keys()
+        active_days = np.bincount(bike_days // num_days, minlength=num_bikes)
+
+        return pd.DataFrame({
+            'bike_id': self.bike_ids,
+            'trips': trips,
+            'active_days': active_days,
+            'ride_seconds': ride_seconds.astype(np.int64),
+            'first_trip_start': pd.to_datetime(first_start, unit='s'),
+            'last_trip_end': pd.to_datetime(last_end, unit='s'),
+            'utilization': ride_seconds / span_seconds,
+            'mean_idle_seconds': np.divide(idle_total, gaps, out=np.full(num_bikes, np.nan), where=gaps > 0),
+            'max_idle_seconds': idle_max,
+            'rebalancing_moves': np.bincount(pair_bikes, weights=teleport, minlength=num_bikes).astype(np.int64),
+        }).set_index('bike_id')
+
+    def save(self, output_dir):
+        """
+        Persist the compact per-bike tables as Parquet
+
+        :param output_dir: Directory to write the tables to
+        :return: dict of table name to path
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        tables = {
+            'bike_summary': self.bike_summary(),
+            'bike_daily_utilization': self.daily_utilization(),
+            'rebalancing_moves': self.rebalancing_moves(),
+        }
+        paths = {}
+        for name, table in tables.items():
+            path = os.path.join(output_dir, f'{name}.parquet')
+            table.to_parquet(path)
+            paths[name] = path
+            print(f"Saved {name}: {len(table):,} rows to {path}")
+        return paths
+
+
+def main():
+    clean_csv_path = os.path.join('bicycle_data', 'processed', 'clean_trips.csv')
+    output_dir = os.path.join('bicycle_data', 'processed', 'bike_index')
+
+    index = BikeTrajectoryIndex.from_csv(clean_csv_path)
+    print(f"Indexed {len(index):,} trips across {len(index.bike_ids):,} bikes")
+    index.save(output_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+# Command-line entry point for the London cycling pipeline
+#
+# Each subcommand imports only what its stage needs, so light operations such as
+# `python scripts/pipeline.py download --list` start without loading pandas,
+# plotly or the BigQuery client.
+
+import os
+import sys
+import argparse
+
+
+def cmd_download(args):
+    import data_ingestion
+
+    if args.list:
+        pending = data_ingestion.pending_files()
+        for filename in pending:
+            print(filename)
+        print(f"{len(pending)} of {len(data_ingestion.filenames)} files pending", file=sys.stderr)
+        return
+
+    data_ingestion.configure_logging()
+    data_ingestion.download_all()
+
+
+def cmd_inspect(args):
+    import data_ingestion
+
+    data_ingestion.inspect_files(data_ingestion.list_raw_files())
+
+
+def cmd_clean(args):
+    import data_ingestion
+
+    data_ingestion.clean_files(data_ingestion.list_raw_files())
+
+
+def cmd_summarize(args):
+    import data_ingestion
+
+    data_ingestion.summarize(rebuild=args.rebuild)
+
+
+def cmd_cache(args):
+    import data_ingestion
+    from trip_cache import open_trip_cache
+
+    cache = open_trip_cache(data_ingestion.PROCESSED_DIR)
+    print(f"Trip cache has {len(cache):,} rows: {', '.join(cache.columns)}")
+
+
+def cmd_load(args):
+    import logging
+    import data_ingestion
+    import warehouse_loader
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    partition_dir = os.path.join(data_ingestion.PROCESSED_DIR, 'partitions')
+    warehouse_loader.write_partitions(data_ingestion.CLEAN_TRIPS_PATH, partition_dir)
+
+    if args.bucket:
+        object_store = warehouse_loader.GCSObjectStore(args.project_id, args.bucket)
+        warehouse = warehouse_loader.BigQueryWarehouse(args.project_id, args.dataset)
+    else:
+        object_store = warehouse_loader.LocalObjectStore(os.path.join(data_ingestion.DATA_DIR, 'object_store'))
+        warehouse = warehouse_loader.LocalWarehouse(os.path.join(data_ingestion.DATA_DIR, 'warehouse'))
+
+    loader = warehouse_loader.WarehouseLoader(object_store, warehouse, max_workers=args.workers)
+    loader.load(partition_dir)
+
+
+def cmd_query(args):
+    import data_ingestion
+    from trip_query import TripQuery
+
+    query = TripQuery.open(data_ingestion.PROCESSED_DIR)
+    counts = query.daily_counts(args.start, args.end)
+    print(counts.to_string())
+    print(f"Total: {counts.sum():,} trips")
+
+
+def cmd_bikes(args):
+    import data_ingestion
+    from bike_index import BikeTrajectoryIndex
+    from trip_cache import open_trip_cache
+
+    index = BikeTrajectoryIndex.from_cache(open_trip_cache(data_ingestion.PROCESSED_DIR))
+    print(f"Indexed {len(index):,} trips across {len(index.bike_ids):,} bikes")
+    index.save(os.path.join(data_ingestion.PROCESSED_DIR, 'bike_index'))
+
+
+def cmd_dashboards(args):
+    if args.local:
+        import data_ingestion
+        from trip_cache import open_trip_cache
+        from station_popularity_dashboard import aggregate_stations_from_cache, build_network_dashboard
+
+        station_df, hourly_df = aggregate_stations_from_cache(open_trip_cache(data_ingestion.PROCESSED_DIR))
+        html_path = os.path.join(args.output_dir, 'station_popularity_network_dashboard.html')
+        build_network_dashboard(station_df, hourly_df, html_path)
+        return
+
+    from day_of_week_dashboard import DayOfWeekDashboard
+    from station_popularity_dashboard import StationPopularityDashboard
+
+    for dashboard_cls in (StationPopularityDashboard, DayOfWeekDashboard):
+        dashboard = dashboard_cls(project_id=args.project_id, dataset=args.dataset)
+        dashboard.create_dashboards(output_dir=args.output_dir)
+        if dashboard_cls is StationPopularityDashboard:
+            dashboard.create_network_dashboard(output_dir=args.output_dir)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="London cycling analytics pipeline")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    download = subparsers.add_parser('download', help="Download raw journey extracts from TfL")
+    download.add_argument('--list', action='store_true', help="Only list files not downloaded yet")
+    download.set_defaults(func=cmd_download)
+
+    inspect = subparsers.add_parser('inspect', help="Inspect the column structure of raw extracts")
+    inspect.set_defaults(func=cmd_inspect)
+
+    clean = subparsers.add_parser('clean', help="Standardize, deduplicate and save raw extracts")
+    clean.set_defaults(func=cmd_clean)
+
+    summarize = subparsers.add_parser('summarize', help="Print the data summary report")
+    summarize.add_argument('--rebuild', action='store_true', help="Recompute the summary from the trip cache")
+    summarize.set_defaults(func=cmd_summarize)
+
+    cache = subparsers.add_parser('cache', help="Build or refresh the memory-mapped trip cache")
+    cache.set_defaults(func=cmd_cache)
+
+    load = subparsers.add_parser('load', help="Load cleaned trips into the warehouse by trip_date")
+    load.add_argument('--project-id', default='your-project-id', help="Google Cloud Project ID")
+    load.add_argument('--dataset', default='london_cycles', help="BigQuery dataset")
+    load.add_argument('--bucket', help="GCS bucket; omit to use the local stand-in")
+    load.add_argument('--workers', type=int, default=8, help="Parallel uploads")
+    load.set_defaults(func=cmd_load)
+
+    query = subparsers.add_parser('query', help="Print daily trip counts for a date range")
+    query.add_argument('start', help="First day, e.g. 2023-06-01")
+    query.add_argument('end', help="Day after the last day, e.g. 2023-07-01")
+    query.set_defaults(func=cmd_query)
+
+    bikes = subparsers.add_parser('bikes', help="Build the per-bike utilization and idle-time index")
+    bikes.set_defaults(func=cmd_bikes)
+
+    dashboards = subparsers.add_parser('dashboards', help="Build the Plotly dashboards")
+    dashboards.add_argument('--project-id', default='your-project-id', help="Google Cloud Project ID")
+    dashboards.add_argument('--dataset', default='your_dataset', help="Dataset containing dbt mart models")
+    dashboards.add_argument('--output-dir', default='dashboards/outputs', help="Directory for dashboard files")
+    dashboards.add_argument('--local', action='store_true',
+                            help="Build the station network dashboard from the local trip cache instead of BigQuery")
+    dashboards.set_defaults(func=cmd_dashboards)
+
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
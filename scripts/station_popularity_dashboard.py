@@ -1,11 +1,299 @@
 # Creating dashboard for Station Popularity using Plotly in Python 
 
 import os
+import numpy as np
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
-from google.cloud import bigquery
+
+# Unicode bars used for the per-station hourly sparklines in the network table
+SPARK_BARS = '▁▂▃▄▅▆▇█'
+
+HOURS = 24
+
+
+def text_sparkline(values):
+    """
+    Render a sequence as a compact unicode sparkline
+
+    :param values: Numeric sequence (e.g. trips per hour)
+    :return: String with one bar character per value
+    """
+    values = np.asarray(values, dtype=float)
+    peak = values.max() if len(values) else 0
+    if peak <= 0:
+        return SPARK_BARS[0] * len(values)
+    levels = np.round(values / peak * (len(SPARK_BARS) - 1)).astype(int)
+    return ''.join(SPARK_BARS[level] for level in levels)
+
+
+def minmax_downsample(values, max_points):
+    """
+    Indices that keep the min and max of each bucket, preserving the shape
+    of a long series while capping the number of plotted points
+
+    :param values: 1-D numeric array
+    :param max_points: Maximum number of indices returned
+    :return: Sorted integer index array
+    """
+    values = np.asarray(values)
+    if len(values) <= max_points:
+        return np.arange(len(values))
+    buckets = np.array_split(np.arange(len(values)), max_points // 2)
+    keep = set()
+    for bucket in buckets:
+        keep.add(bucket[np.argmin(values[bucket])])
+        keep.add(bucket[np.argmax(values[bucket])])
+    return np.array(sorted(keep))
+
+
+def downsample_rows(matrix, labels, max_rows):
+    """
+    Average consecutive rows into at most max_rows blocks
+
+    :param matrix: 2-D array with one row per station
+    :param labels: Label per row
+    :return: (downsampled matrix, block labels)
+    """
+    if len(matrix) <= max_rows:
+        return matrix, list(labels)
+    blocks = np.array_split(np.arange(len(matrix)), max_rows)
+    reduced = np.vstack([matrix[block].mean(axis=0) for block in blocks])
+    block_labels = [f"{labels[block[0]]} – {labels[block[-1]]}" for block in blocks]
+    return reduced, block_labels
+
+
+def collapse_stations(station_df):
+    """
+    Reduce station rows to one per station_id
+
+    mart_station_popularity groups by (station_id, station_name), so a
+    station renamed over time has one row per name. Counts are summed and
+    the name with the most traffic is kept.
+
+    :param station_df: mart_station_popularity rows
+    :return: DataFrame with one row per station_id
+    """
+    df = station_df.assign(station_id=station_df['station_id'].astype(str))
+    df = df.sort_values('total_traffic', ascending=False)
+    grouped = df.groupby('station_id', sort=False)
+    collapsed = grouped[['total_starts', 'total_ends', 'total_traffic']].sum()
+    collapsed['net_flow'] = collapsed['total_starts'] - collapsed['total_ends']
+    collapsed['station_name'] = grouped['station_name'].first()
+    return collapsed.reset_index()
+
+
+def hourly_matrix(station_ids, hourly_df):
+    """
+    Pivot long hourly counts into a compact (stations x 24) int32 array
+
+    :param station_ids: Unique station ids in the desired row order
+    :param hourly_df: DataFrame with station_id, hour_of_day, starts, ends
+    :return: numpy array of trips (starts + ends) per station and hour
+    """
+    station_index = pd.Index(station_ids).astype(str)
+    if not station_index.is_unique:
+        raise ValueError("hourly_matrix needs one row per station; use collapse_stations first")
+    rows = station_index.get_indexer(hourly_df['station_id'].astype(str))
+    hours = pd.to_numeric(hourly_df['hour_of_day'], errors='coerce').to_numpy(dtype=float)
+    trips = (hourly_df['starts'].fillna(0) + hourly_df['ends'].fillna(0)).to_numpy(dtype=np.int64)
+    valid = (rows >= 0) & (hours >= 0) & (hours < HOURS)
+    matrix = np.zeros((len(station_index), HOURS), dtype=np.int32)
+    np.add.at(matrix, (rows[valid], hours[valid].astype(int)), trips[valid])
+    return matrix
+
+
+def aggregate_stations_from_cache(cache):
+    """
+    Build the station and hourly tables locally from the memory-mapped trip
+    cache, matching mart_station_popularity and mart_station_hourly
+
+    :param cache: TripCache of cleaned trips
+    :return: (station DataFrame, hourly DataFrame)
+    """
+    from trip_cache import NAT_VALUE
+
+    # Start and end codes share one label list, so a station is the same row in both roles
+    (start_codes, end_codes), station_ids = cache.shared_codes(['start_station_id', 'end_station_id'])
+    num_stations = len(station_ids)
+
+    counts, hourly, names = {}, {}, []
+    for role, codes in (('start', start_codes), ('end', end_codes)):
+        valid = codes >= 0
+        counts[role] = np.bincount(codes[valid], minlength=num_stations)
+
+        timestamps = np.asarray(cache.column(f'{role}_date'))
+        has_time = valid & (timestamps != NAT_VALUE)
+        hours = (timestamps[has_time] // 3600) % HOURS
+        hourly[role] = np.bincount(codes[has_time].astype(np.int64) * HOURS + hours,
+                                   minlength=num_stations * HOURS)
+
+        # Name of each station as first seen in this role
+        seen, first_row = np.unique(codes[valid], return_index=True)
+        name_codes = np.asarray(cache.column(f'{role}_station_name'))[np.flatnonzero(valid)[first_row]]
+        name_labels = cache.categories(f'{role}_station_name')
+        names.append(pd.Series(
+            np.where(name_codes >= 0, np.asarray(name_labels, dtype=object)[name_codes], None),
+            index=station_ids[seen]
+        ).dropna())
+
+    # A round trip starts and ends at the same station and counts once
+    # towards its traffic, as in int_station_popularity
+    round_trip = (start_codes >= 0) & (start_codes == end_codes)
+    round_trips = np.bincount(start_codes[round_trip], minlength=num_stations)
+
+    station_df = pd.DataFrame({
+        'station_id': np.asarray(station_ids, dtype=object),
+        'total_starts': counts['start'].astype(np.int64),
+        'total_ends': counts['end'].astype(np.int64),
+        'total_traffic': (counts['start'] + counts['end'] - round_trips).astype(np.int64),
+        'net_flow': (counts['start'] - counts['end']).astype(np.int64),
+    })
+    station_df['station_name'] = names[0].combine_first(names[1]).reindex(station_ids).to_numpy()
+
+    hourly_df = pd.DataFrame({
+        'station_id': np.repeat(np.asarray(station_ids, dtype=object), HOURS),
+        'hour_of_day': np.tile(np.arange(HOURS, dtype=np.int64), num_stations),
+        'starts': hourly['start'].astype(np.int64),
+        'ends': hourly['end'].astype(np.int64),
+    })
+    return station_df, hourly_df
+
+
+def build_network_dashboard(station_df, hourly_df, output_path, page_size=50,
+                            max_scatter_points=2000, max_heatmap_rows=150):
+    """
+    Render the full-network station dashboard as one compact HTML file
+
+    Contains a ranked, paginated table with hourly sparklines, a WebGL rank
+    plot, the net-flow distribution and a downsampled hourly heatmap. Data is
+    pre-aggregated into small arrays and plotly.js is loaded from the CDN, so
+    the file stays small at full station coverage.
+
+    :param station_df: mart_station_popularity rows; a station with several
+        names is collapsed into one row
+    :param hourly_df: station_id, hour_of_day, starts, ends
+    :param output_path: Path of the HTML file to write
+    :param page_size: Stations per table page
+    :param max_scatter_points: Point budget for the rank plot
+    :param max_heatmap_rows: Row budget for the hourly heatmap
+    :return: plotly Figure
+    """
+    df = collapse_stations(station_df).sort_values('total_traffic', ascending=False).reset_index(drop=True)
+    df['rank'] = np.arange(1, len(df) + 1)
+    hourly = hourly_matrix(df['station_id'], hourly_df)
+    df['hourly'] = [text_sparkline(row) for row in hourly]
+
+    fig = make_subplots(
+        rows=3, cols=2,
+        subplot_titles=(
+            'All Stations Ranked by Total Traffic',
+            'Total Traffic by Rank',
+            'Net Flow Distribution (Starts minus Ends)',
+            'Hourly Usage Profile by Station Rank (share of station peak)'
+        ),
+        vertical_spacing=0.08,
+        row_heights=[0.4, 0.25, 0.35],
+        specs=[
+            [{"type": "table", "colspan": 2}, None],
+            [{"type": "xy"}, {"type": "xy"}],
+            [{"type": "heatmap", "colspan": 2}, None]
+        ]
+    )
+
+    # 1. Ranked, paginated table
+    table_columns = ['rank', 'station_name', 'total_traffic', 'total_starts', 'total_ends', 'net_flow', 'hourly']
+    headers = ['Rank', 'Station', 'Traffic', 'Starts', 'Ends', 'Net Flow', 'Hourly (0–23h)']
+
+    def page_cells(page):
+        page_df = df.iloc[page * page_size:(page + 1) * page_size]
+        return [page_df[col].tolist() for col in table_columns]
+
+    fig.add_trace(
+        go.Table(
+            header=dict(values=headers, fill_color='royalblue', font=dict(color='white'), align='left'),
+            cells=dict(values=page_cells(0), align='left', font=dict(family='monospace')),
+            columnwidth=[40, 220, 70, 70, 70, 70, 160]
+        ),
+        row=1, col=1
+    )
+    num_pages = max(1, int(np.ceil(len(df) / page_size)))
+    page_buttons = [
+        dict(
+            label=f"{page * page_size + 1}–{min((page + 1) * page_size, len(df))}",
+            method='restyle',
+            args=[{'cells.values': [page_cells(page)]}, [0]]
+        )
+        for page in range(num_pages)
+    ]
+
+    # 2. Rank plot with WebGL, downsampled past the point budget
+    keep = minmax_downsample(df['total_traffic'].to_numpy(), max_scatter_points)
+    fig.add_trace(
+        go.Scattergl(
+            x=df['rank'].to_numpy()[keep],
+            y=df['total_traffic'].to_numpy()[keep],
+            text=df['station_name'].to_numpy()[keep],
+            mode='markers',
+            marker=dict(size=4, color='royalblue'),
+            name='Total Traffic',
+            hovertemplate='#%{x} %{text}<br>%{y:,} trips<extra></extra>'
+        ),
+        row=2, col=1
+    )
+
+    # 3. Net flow distribution
+    fig.add_trace(
+        go.Histogram(
+            x=df['net_flow'],
+            nbinsx=60,
+            marker_color='lightcoral',
+            name='Net Flow'
+        ),
+        row=2, col=2
+    )
+
+    # 4. Hourly profile heatmap, block-averaged down to the row budget
+    peaks = hourly.max(axis=1, keepdims=True)
+    profile = np.divide(hourly, peaks, out=np.zeros(hourly.shape), where=peaks > 0)
+    profile, row_labels = downsample_rows(profile, df['rank'].tolist(), max_heatmap_rows)
+    fig.add_trace(
+        go.Heatmap(
+            z=np.round(profile, 2),
+            x=list(range(HOURS)),
+            y=[str(label) for label in row_labels],
+            colorscale='Blues',
+            showscale=False,
+            hovertemplate='Rank %{y}, %{x}:00<br>%{z:.0%} of peak<extra></extra>'
+        ),
+        row=3, col=1
+    )
+
+    fig.update_yaxes(type='log', title_text='Trips', row=2, col=1)
+    fig.update_xaxes(title_text='Station Rank', row=2, col=1)
+    fig.update_xaxes(title_text='Net Flow', row=2, col=2)
+    fig.update_xaxes(title_text='Hour of Day', dtick=2, row=3, col=1)
+    fig.update_yaxes(autorange='reversed', showticklabels=False, title_text='Station Rank', row=3, col=1)
+    fig.update_layout(
+        height=1600,
+        width=1100,
+        title_text=f"London Bicycle Station Network ({len(df):,} stations)",
+        showlegend=False,
+        updatemenus=[dict(
+            buttons=page_buttons,
+            direction='down',
+            x=1.0, xanchor='right',
+            y=1.02, yanchor='bottom',
+            showactive=True
+        )]
+    )
+
+    os.makedirs(os.path.dirname(output_path) or '.', exist_ok=True)
+    # Load plotly.js from the CDN rather than embedding ~3.5 MB per file
+    fig.write_html(output_path, include_plotlyjs='cdn')
+    print(f"Saved interactive dashboard: {output_path}")
+    return fig
 
 class StationPopularityDashboard:
     def __init__(self, project_id, dataset, mart_table='mart_station_popularity'):
@@ -16,6 +304,8 @@ class StationPopularityDashboard:
         :param dataset: Dataset containing dbt mart model
         :param mart_table: Name of the mart table
         """
+        from google.cloud import bigquery
+
         self.client = bigquery.Client(project=project_id)
         self.project_id = project_id
         self.dataset = dataset
@@ -25,9 +315,10 @@ class StationPopularityDashboard:
         """
         Fetch station popularity data from dbt mart model
         
-        :param limit: Number of top stations to retrieve
+        :param limit: Number of top stations to retrieve, or None for all stations
         :return: pandas DataFrame with station data
         """
+        limit_clause = f"LIMIT {int(limit)}" if limit is not None else ""
         query = f"""
         SELECT
           station_id,
@@ -38,13 +329,44 @@ class StationPopularityDashboard:
           net_flow
         FROM `{self.project_id}.{self.dataset}.{self.mart_table}`
         ORDER BY total_traffic DESC
-        LIMIT {limit}
+        {limit_clause}
         """
         
         # Execute query and convert to DataFrame
         df = self.client.query(query).to_dataframe()
         return df
     
+    def fetch_station_hourly(self, hourly_table='mart_station_hourly'):
+        """
+        Fetch per-station hourly starts and ends, aggregated in BigQuery
+        
+        :param hourly_table: Name of the hourly mart table
+        :return: pandas DataFrame with station_id, hour_of_day, starts, ends
+        """
+        query = f"""
+        SELECT
+          station_id,
+          hour_of_day,
+          starts,
+          ends
+        FROM `{self.project_id}.{self.dataset}.{hourly_table}`
+        """
+        
+        # Execute query and convert to DataFrame
+        df = self.client.query(query).to_dataframe()
+        return df
+    
+    def create_network_dashboard(self, output_dir='dashboards/outputs'):
+        """
+        Generate the full-network station dashboard covering every station
+        
+        :param output_dir: Directory to save dashboard files
+        """
+        station_df = self.fetch_station_data(limit=None)
+        hourly_df = self.fetch_station_hourly()
+        html_path = os.path.join(output_dir, 'station_popularity_network_dashboard.html')
+        return build_network_dashboard(station_df, hourly_df, html_path)
+    
     def create_dashboards(self, output_dir='dashboards/outputs'):
         """
         Generate and save station popularity dashboards
@@ -196,6 +518,7 @@ def main():
     
     # Generate all dashboards
     dashboard.create_dashboards()
+    dashboard.create_network_dashboard()
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
@@ -0,0 +1,370 @@
+# Memory-mapped columnar cache of the cleaned trips
+
+import os
+import json
+import shutil
+import numpy as np
+import pandas as pd
+
+# How each cleaned column is stored: category -> int32 codes + labels,
+# datetime -> int64 unix seconds, otherwise a fixed numpy dtype
+CACHE_SCHEMA = {
+    'source_file': 'category',
+    'rental_id': 'float64',
+    'start_date': 'datetime',
+    'end_date': 'datetime',
+    'start_station_id': 'category',
+    'start_station_name': 'category',
+    'end_station_id': 'category',
+    'end_station_name': 'category',
+    'bike_id': 'category',
+    'duration_seconds': 'float64',
+    'day_of_week': 'category',
+    'hour_of_day': 'int8',
+    'month': 'int8',
+    'year': 'int16',
+    'month_name': 'category',
+}
+
+# Category columns are read as text so labels are exactly the CSV values,
+# whatever type pandas would otherwise guess for a chunk (e.g. '123' not '123.0')
+CATEGORY_DTYPES = {col: str for col, kind in CACHE_SCHEMA.items() if kind == 'category'}
+
+# Stored for missing datetimes and integers (numpy maps NaT to int64 min)
+NAT_VALUE = np.iinfo(np.int64).min
+MISSING_INT = -1
+
+MANIFEST_NAME = 'manifest.json'
+
+# Bumped whenever the on-disk layout changes so older caches get rebuilt
+CACHE_VERSION = 3
+DAY_INDEX_NAME = 'day_offsets.npy'
+
+# Rows are stored sorted by this column, with a per-day offset index over it
+SORT_COLUMN = 'start_date'
+SECONDS_PER_DAY = 24 * 60 * 60
+
+
+def fingerprint(paths):
+    """
+    Identify a set of processed files by name, size and modification time
+
+    :param paths: Processed files the cache is built from
+    :return: list that changes whenever any file is added, removed or rewritten
+    """
+    entries = []
+    for path in sorted(paths):
+        if os.path.exists(path):
+            stat = os.stat(path)
+            entries.append([os.path.abspath(path), stat.st_size, stat.st_mtime_ns])
+    return entries
+
+
+def _storage_dtype(kind):
+    if kind == 'category':
+        return np.dtype(np.int32)
+    if kind == 'datetime':
+        return np.dtype(np.int64)
+    return np.dtype(kind)
+
+
+class TripCache:
+    def __init__(self, cache_dir, source_paths):
+        """
+        Per-column .npy cache of the cleaned trips that opens memory-mapped
+
+        Rows are sorted by start time and a per-day offset index is kept
+        alongside, so date ranges resolve to contiguous row slices.
+
+        :param cache_dir: Directory holding the cached columns
+        :param source_paths: Processed files the cache is derived from; the
+            cache is rebuilt whenever this file set changes
+        """
+        self.cache_dir = cache_dir
+        self.source_paths = list(source_paths)
+        self._manifest = None
+        self._categories = {}
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def manifest(self):
+        if self._manifest is None:
+            path = self._path(MANIFEST_NAME)
+            if not os.path.exists(path):
+                return None
+            with open(path) as f:
+                self._manifest = json.load(f)
+        return self._manifest
+
+    def is_valid(self):
+        """True if the cache exists and matches the current processed files"""
+        manifest = self.manifest()
+        return (manifest is not None
+                and manifest.get('version') == CACHE_VERSION
+                and manifest['fingerprint'] == fingerprint(self.source_paths))
+
+    def ensure(self, chunksize=1_000_000):
+        """Rebuild the cache if it is missing or stale, then return self"""
+        if not self.is_valid():
+            self.build(chunksize=chunksize)
+        return self
+
+    def _encode_chunk(self, chunk, labels):
+        encoded = {}
+        for col, kind in CACHE_SCHEMA.items():
+            if col not in chunk.columns:
+                continue
+            values = chunk[col]
+            if kind == 'category':
+                codes, uniques = pd.factorize(values.astype('string'))
+                lookup = labels.setdefault(col, {})
+                # Trailing -1 makes factorize's missing code (-1) map to missing
+                mapped = np.array([lookup.setdefault(u, len(lookup)) for u in uniques] + [-1], dtype=np.int32)
+                encoded[col] = mapped[codes]
+            elif kind == 'datetime':
+                timestamps = pd.to_datetime(values, errors='coerce')
+                encoded[col] = timestamps.to_numpy(dtype='datetime64[s]').astype(np.int64)
+            elif np.issubdtype(np.dtype(kind), np.integer):
+                encoded[col] = pd.to_numeric(values, errors='coerce').fillna(MISSING_INT).to_numpy().astype(kind)
+            else:
+                encoded[col] = pd.to_numeric(values, errors='coerce').to_numpy().astype(kind)
+        return encoded
+
+    def build(self, chunksize=1_000_000):
+        """
+        Convert the processed CSV files into per-column .npy arrays
+
+        Chunks are appended to raw column files first, the start-time order
+        is computed with a chunked bucket sort (see _sort_order), and each
+        column is then gathered into its sorted .npy file slice by slice.
+        Memory is bounded by chunksize plus the rows of the busiest day.
+        """
+        source_fingerprint = fingerprint(self.source_paths)
+        build_dir = self.cache_dir + '.building'
+        if os.path.exists(build_dir):
+            shutil.rmtree(build_dir)
+        os.makedirs(build_dir)
+
+        labels = {}
+        rows = 0
+        raw_files = {}
+        try:
+            for path in self.source_paths:
+                if not os.path.exists(path):
+                    continue
+                for chunk in pd.read_csv(path, chunksize=chunksize, dtype=CATEGORY_DTYPES, low_memory=False):
+                    for col, values in self._encode_chunk(chunk, labels).items():
+                        if col not in raw_files:
+                            if rows:
+                                raise ValueError(f"Column {col} missing from earlier rows of {path}")
+                            raw_files[col] = open(os.path.join(build_dir, f'{col}.raw'), 'wb')
+                        values.tofile(raw_files[col])
+                    rows += len(chunk)
+        finally:
+            for f in raw_files.values():
+                f.close()
+
+        # Keep rows sorted by start time so date ranges map to contiguous slices
+        order = None
+        first_day = None
+        if SORT_COLUMN in raw_files and rows:
+            order, first_day = self._sort_order(build_dir, rows, chunksize)
+
+        columns = {}
+        for col in raw_files:
+            kind = CACHE_SCHEMA[col]
+            dtype = _storage_dtype(kind)
+            raw_path = os.path.join(build_dir, f'{col}.raw')
+            out = np.lib.format.open_memmap(os.path.join(build_dir, f'{col}.npy'), mode='w+', dtype=dtype, shape=(rows,))
+            if rows:
+                raw = np.memmap(raw_path, dtype=dtype, mode='r', shape=(rows,))
+                # Gather one slice at a time so only chunksize rows are in memory
+                for start in range(0, rows, chunksize):
+                    stop = min(start + chunksize, rows)
+                    out[start:stop] = raw[start:stop] if order is None else raw[order[start:stop]]
+                del raw
+            out.flush()
+            del out
+            os.remove(raw_path)
+
+            if kind == 'category':
+                with open(os.path.join(build_dir, f'{col}.labels.json'), 'w') as f:
+                    json.dump(list(labels.get(col, {})), f)
+            columns[col] = kind
+
+        is_sorted = order is not None
+        if is_sorted:
+            del order
+            os.remove(os.path.join(build_dir, 'order.npy'))
+
+        manifest = {
+            'version': CACHE_VERSION,
+            'fingerprint': source_fingerprint,
+            'rows': rows,
+            'columns': columns,
+            'sorted_by': SORT_COLUMN if is_sorted else None,
+            'first_day': first_day,
+        }
+        with open(os.path.join(build_dir, MANIFEST_NAME), 'w') as f:
+            json.dump(manifest, f, indent=2)
+
+        # Swap the finished cache into place so readers never see a partial build
+        if os.path.exists(self.cache_dir):
+            shutil.rmtree(self.cache_dir)
+        os.replace(build_dir, self.cache_dir)
+        self._manifest = None
+        self._categories = {}
+        print(f"Built trip cache with {rows:,} rows and {len(columns)} columns in {self.cache_dir}")
+        return self
+
+    def _sort_order(self, build_dir, rows, chunksize):
+        """
+        Compute the row order sorted by start time, in bounded memory
+
+        Rows are bucketed by start day with a counting sort over chunks of
+        the raw start column, then each day's rows are sorted by time. Memory
+        is bounded by chunksize plus the busiest day; the order itself is an
+        on-disk memmap. The day bucket boundaries are saved as the day index:
+        day_offsets[i] is the first row starting on or after first_day + i,
+        with one extra trailing entry equal to the row count.
+
+        :return: (order memmap, first indexed day as days since the epoch or None)
+        """
+        keys = np.memmap(os.path.join(build_dir, f'{SORT_COLUMN}.raw'), dtype=np.int64, mode='r', shape=(rows,))
+
+        # First pass: range of start days
+        first_day, last_day = None, None
+        for start in range(0, rows, chunksize):
+            chunk = keys[start:start + chunksize]
+            days = chunk[chunk != NAT_VALUE] // SECONDS_PER_DAY
+            if len(days):
+                first_day = int(days.min()) if first_day is None else min(first_day, int(days.min()))
+                last_day = int(days.max()) if last_day is None else max(last_day, int(days.max()))
+
+        # Bucket 0 holds missing timestamps, which sort first; bucket 1 + i holds first_day + i
+        num_buckets = 1 if first_day is None else last_day - first_day + 2
+
+        def buckets_of(chunk):
+            bucket = np.zeros(len(chunk), dtype=np.int64)
+            valid = chunk != NAT_VALUE
+            if first_day is not None:
+                bucket[valid] = chunk[valid] // SECONDS_PER_DAY - first_day + 1
+            return bucket
+
+        # Second pass: rows per bucket
+        counts = np.zeros(num_buckets, dtype=np.int64)
+        for start in range(0, rows, chunksize):
+            counts += np.bincount(buckets_of(keys[start:start + chunksize]), minlength=num_buckets)
+        bucket_starts = np.concatenate([[0], np.cumsum(counts)])
+
+        # Third pass: scatter row numbers into their bucket, keeping row order within it
+        order = np.lib.format.open_memmap(os.path.join(build_dir, 'order.npy'), mode='w+', dtype=np.int64, shape=(rows,))
+        cursor = bucket_starts[:-1].copy()
+        for start in range(0, rows, chunksize):
+            bucket = buckets_of(keys[start:start + chunksize])
+            by_bucket = np.argsort(bucket, kind='stable')
+            sorted_bucket = bucket[by_bucket]
+            chunk_counts = np.bincount(sorted_bucket, minlength=num_buckets)
+            first_in_bucket = np.concatenate([[0], np.cumsum(chunk_counts)[:-1]])
+            rank = np.arange(len(bucket)) - first_in_bucket[sorted_bucket]
+            order[cursor[sorted_bucket] + rank] = start + by_bucket
+            cursor += chunk_counts
+
+        # Finally sort each day by time; missing timestamps keep their row order
+        for bucket in range(1, num_buckets):
+            lo, hi = bucket_starts[bucket], bucket_starts[bucket + 1]
+            if hi - lo > 1:
+                day_rows = np.array(order[lo:hi])
+                order[lo:hi] = day_rows[np.argsort(keys[day_rows], kind='stable')]
+        order.flush()
+        del keys
+
+        if first_day is not None:
+            np.save(os.path.join(build_dir, DAY_INDEX_NAME), bucket_starts[1:])
+        return order, first_day
+
+    def day_offsets(self):
+        """Per-day row offsets into the sorted cache (see _sort_order)"""
+        return np.load(self._path(DAY_INDEX_NAME), mmap_mode='r')
+
+    def __len__(self):
+        return self.manifest()['rows']
+
+    @property
+    def columns(self):
+        return list(self.manifest()['columns'])
+
+    def column(self, col):
+        """
+        Memory-mapped raw column: int32 codes for categories, int64 unix
+        seconds for datetimes, plain numbers otherwise
+        """
+        return np.load(self._path(f'{col}.npy'), mmap_mode='r')
+
+    def categories(self, col):
+        """Labels for the int32 codes of a category column"""
+        if col not in self._categories:
+            with open(self._path(f'{col}.labels.json')) as f:
+                self._categories[col] = pd.Index(json.load(f), dtype=object)
+        return self._categories[col]
+
+    def shared_codes(self, cols):
+        """
+        Codes of several category columns mapped onto one shared label list
+
+        Later columns' codes are remapped through their labels, so equal
+        labels get equal codes across columns without decoding any rows.
+
+        :param cols: Category columns, e.g. start and end station ids
+        :return: (list of int32 code arrays, pd.Index of shared labels);
+            missing values keep code -1
+        """
+        labels = self.categories(cols[0])
+        codes = [np.asarray(self.column(cols[0]))]
+        for col in cols[1:]:
+            col_labels = self.categories(col)
+            lookup = labels.get_indexer(col_labels)
+            unseen = lookup == -1
+            lookup[unseen] = len(labels) + np.arange(unseen.sum())
+            labels = labels.append(col_labels[unseen])
+            # Trailing -1 makes the missing code (-1) map to missing
+            lookup = np.append(lookup, -1).astype(np.int32)
+            codes.append(lookup[np.asarray(self.column(col))])
+        return codes, labels
+
+    def decode(self, col, values):
+        """Turn raw stored values of a column back into pandas values"""
+        kind = self.manifest()['columns'][col]
+        if kind == 'category':
+            return pd.Categorical.from_codes(np.asarray(values), categories=self.categories(col))
+        if kind == 'datetime':
+            # NAT_VALUE is exactly NaT's integer representation, so a view is enough
+            return pd.to_datetime(np.asarray(values).view('datetime64[s]'))
+        return np.asarray(values)
+
+    def to_frame(self, columns=None, rows=slice(None)):
+        """
+        Materialize selected columns and rows as a DataFrame
+
+        Only the pages backing the requested rows are read from disk.
+
+        :param columns: Columns to include (defaults to all)
+        :param rows: slice or integer index array of rows
+        :return: pandas DataFrame
+        """
+        columns = columns or self.columns
+        return pd.DataFrame({col: self.decode(col, self.column(col)[rows]) for col in columns})
+
+
+def open_trip_cache(processed_dir, source_paths=None):
+    """
+    Open the trip cache for a processed directory, rebuilding it if stale
+
+    :param processed_dir: Directory holding clean_trips.csv
+    :param source_paths: Processed files to cache (defaults to clean_trips.csv)
+    :return: TripCache ready for reading
+    """
+    if source_paths is None:
+        source_paths = [os.path.join(processed_dir, 'clean_trips.csv')]
+    return TripCache(os.path.join(processed_dir, 'trip_cache'), source_paths).ensure()
@@ -0,0 +1,258 @@
+# Cross-extract deduplication of trips
+
+import os
+import json
+import numpy as np
+import pandas as pd
+
+# Columns combined into a trip key when no rental id is available
+COMPOSITE_KEY_COLUMNS = [
+    'start_date',
+    'end_date',
+    'start_station_id',
+    'end_station_id',
+    'bike_id',
+]
+
+# Hashed keys get the top bit set so they can never collide with a rental id
+HASHED_KEY_FLAG = np.uint64(1 << 63)
+
+# Journal of the run in progress: the output size before appending, and
+# whether the output was complete when commit() started
+RUN_JOURNAL_NAME = 'run.json'
+
+
+class TripDeduplicator:
+    def __init__(self, state_dir, num_partitions=64):
+        """
+        Drop trips that were already seen in this run or in earlier runs
+
+        Keys are hash-partitioned into sorted uint64 arrays stored on disk
+        (one .npy file per partition), so only one partition is resident at
+        a time and the key set persists across incremental runs. Keys of the
+        current run are staged as small sorted pending files, one per
+        partition per filter_new() call, until commit() merges them.
+
+        Appending the run's trips to the output and committing its keys are
+        journaled together (see begin() and commit()), so a run interrupted
+        at any point is either rolled back or finished when the next
+        TripDeduplicator is created on the same state directory.
+
+        :param state_dir: Directory holding the persistent key partitions
+        :param num_partitions: Number of hash partitions for the key set
+        """
+        self.state_dir = state_dir
+        self.num_partitions = num_partitions
+        self._calls = 0
+        os.makedirs(state_dir, exist_ok=True)
+        self.recover()
+
+    def _partition_path(self, partition):
+        return os.path.join(self.state_dir, f'keys-{partition:05d}.npy')
+
+    def _pending_path(self, partition, call):
+        return os.path.join(self.state_dir, f'keys-{partition:05d}.pending-{call:05d}.npy')
+
+    def _pending_paths(self, partition):
+        prefix = f'keys-{partition:05d}.pending-'
+        return sorted(os.path.join(self.state_dir, name) for name in os.listdir(self.state_dir)
+                      if name.startswith(prefix) and name.endswith('.npy'))
+
+    def _journal_path(self):
+        return os.path.join(self.state_dir, RUN_JOURNAL_NAME)
+
+    def _read_journal(self):
+        if not os.path.exists(self._journal_path()):
+            return None
+        with open(self._journal_path()) as f:
+            return json.load(f)
+
+    def _write_journal(self, journal):
+        tmp_path = self._journal_path() + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(journal, f)
+        os.replace(tmp_path, self._journal_path())
+
+    def _discard_pending(self):
+        for partition in range(self.num_partitions):
+            for pending_path in self._pending_paths(partition):
+                os.remove(pending_path)
+
+    def recover(self):
+        """
+        Finish or roll back a run that was interrupted before commit() returned
+
+        If commit() had started, the output was complete, so the remaining
+        pending keys are merged. Otherwise the output is truncated back to
+        its size before the run and the pending keys are discarded.
+
+        :return: 'committed', 'rolled back', or None if nothing was pending
+        """
+        journal = self._read_journal()
+        if journal is None:
+            # Keys staged without begin() were never tied to any output
+            self._discard_pending()
+            return None
+
+        if journal['committing']:
+            self._merge_pending()
+            os.remove(self._journal_path())
+            return 'committed'
+
+        output_path = journal['output_path']
+        if journal['output_size'] is None:
+            if os.path.exists(output_path):
+                os.remove(output_path)
+        elif os.path.exists(output_path) and os.path.getsize(output_path) > journal['output_size']:
+            with open(output_path, 'r+b') as f:
+                f.truncate(journal['output_size'])
+        self._discard_pending()
+        os.remove(self._journal_path())
+        return 'rolled back'
+
+    def begin(self, output_path):
+        """
+        Record the output's current size before this run appends to it
+
+        :param output_path: File the run's new trips will be appended to
+        """
+        self._write_journal({
+            'output_path': os.path.abspath(output_path),
+            'output_size': os.path.getsize(output_path) if os.path.exists(output_path) else None,
+            'committing': False,
+        })
+
+    def _load_keys(self, path):
+        # Memory-mapped, so membership checks only page in what searchsorted touches
+        if not os.path.exists(path):
+            return np.empty(0, dtype=np.uint64)
+        return np.load(path, mmap_mode='r')
+
+    def _save_keys(self, path, keys):
+        # Write to a temporary file first so a crash never leaves a torn partition
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            np.save(f, keys)
+        os.replace(tmp_path, path)
+
+    @staticmethod
+    def _contains(sorted_keys, keys):
+        if len(sorted_keys) == 0:
+            return np.zeros(len(keys), dtype=bool)
+        idx = np.searchsorted(sorted_keys, keys)
+        idx[idx == len(sorted_keys)] = 0
+        return sorted_keys[idx] == keys
+
+    def trip_keys(self, df):
+        """
+        Compute a uint64 key for each trip
+
+        Uses `rental_id` where present, otherwise a hash of the composite
+        trip columns (flagged so it cannot clash with a real rental id).
+
+        :param df: Standardized trips DataFrame
+        :return: numpy uint64 array aligned with df rows
+        """
+        keys = np.zeros(len(df), dtype=np.uint64)
+        if 'rental_id' in df.columns:
+            rental_ids = pd.to_numeric(df['rental_id'], errors='coerce')
+            has_id = rental_ids.notna().to_numpy()
+        else:
+            has_id = np.zeros(len(df), dtype=bool)
+
+        if has_id.any():
+            keys[has_id] = rental_ids[has_id].astype(np.int64).to_numpy().astype(np.uint64)
+
+        if not has_id.all():
+            composite = df.loc[~has_id, COMPOSITE_KEY_COLUMNS].astype(str)
+            hashed = pd.util.hash_pandas_object(composite, index=False).to_numpy()
+            keys[~has_id] = hashed | HASHED_KEY_FLAG
+
+        return keys
+
+    def filter_new(self, df):
+        """
+        Return only trips not seen before, and stage their keys
+
+        Duplicates within df, against earlier calls in this run, and against
+        committed runs are all removed. Staged keys go to per-partition
+        pending files and only join the committed key set in commit(), which
+        should be called once the output is saved. Call begin() first so an
+        interrupted run can be rolled back.
+
+        :param df: Standardized trips DataFrame
+        :return: DataFrame containing the new trips
+        """
+        if df.empty:
+            return df
+
+        keys = self.trip_keys(df)
+
+        # Drop duplicates inside this chunk, keeping the first occurrence
+        _, first_idx = np.unique(keys, return_index=True)
+        keep = np.zeros(len(keys), dtype=bool)
+        keep[first_idx] = True
+
+        partitions = keys % np.uint64(self.num_partitions)
+        for partition in np.unique(partitions[keep]):
+            partition = int(partition)
+            in_partition = keep & (partitions == partition)
+            partition_keys = keys[in_partition]
+
+            seen = self._contains(self._load_keys(self._partition_path(partition)), partition_keys)
+            for pending_path in self._pending_paths(partition):
+                seen |= self._contains(self._load_keys(pending_path), partition_keys)
+
+            keep[np.flatnonzero(in_partition)[seen]] = False
+            new_keys = partition_keys[~seen]
+            if len(new_keys):
+                # Each call adds its own sorted file instead of rewriting the run's keys so far
+                self._save_keys(self._pending_path(partition, self._calls), np.sort(new_keys))
+
+        self._calls += 1
+        return df[keep]
+
+    def commit(self):
+        """
+        Merge all staged keys into their on-disk partitions, one at a time
+
+        Call once the output written since begin() is complete. The journal
+        is marked first, so a crash part-way through is finished by recover().
+
+        :return: Number of keys written
+        """
+        journal = self._read_journal()
+        if journal is not None:
+            journal['committing'] = True
+            self._write_journal(journal)
+        written = self._merge_pending()
+        if journal is not None:
+            os.remove(self._journal_path())
+        return written
+
+    def _merge_pending(self):
+        # Merging is idempotent, so a partition interrupted after its
+        # os.replace but before removing its pending files is safe to redo
+        written = 0
+        for partition in range(self.num_partitions):
+            pending_paths = self._pending_paths(partition)
+            if not pending_paths:
+                continue
+            new_keys = np.concatenate([np.load(path) for path in pending_paths])
+            merged = np.union1d(self._load_keys(self._partition_path(partition)), new_keys)
+            self._save_keys(self._partition_path(partition), merged)
+            for path in pending_paths:
+                os.remove(path)
+            written += len(new_keys)
+        return written
+
+    def seen_count(self):
+        """
+        Count committed keys across all partitions
+        """
+        total = 0
+        for partition in range(self.num_partitions):
+            path = self._partition_path(partition)
+            if os.path.exists(path):
+                total += len(np.load(path, mmap_mode='r'))
+        return total
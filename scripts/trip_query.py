@@ -0,0 +1,93 @@
+# Date-range queries over the sorted trip cache
+
+import numpy as np
+import pandas as pd
+
+from trip_cache import SORT_COLUMN, SECONDS_PER_DAY, open_trip_cache
+
+
+def _to_seconds(value):
+    return int(pd.Timestamp(value).value // 1_000_000_000)
+
+
+class TripQuery:
+    def __init__(self, cache):
+        """
+        Query trips by start time using the cache's per-day offset index
+
+        Date ranges are resolved to a contiguous row slice by binary search,
+        so only the rows and columns requested are read from disk.
+
+        :param cache: TripCache built with rows sorted by start time
+        """
+        manifest = cache.manifest()
+        if manifest.get('sorted_by') != SORT_COLUMN:
+            raise ValueError(f"Trip cache is not sorted by {SORT_COLUMN}, rebuild it first")
+        self.cache = cache
+        self.first_day = manifest['first_day']
+        self.day_offsets = cache.day_offsets() if self.first_day is not None else np.zeros(1, dtype=np.int64)
+        self.starts = cache.column(SORT_COLUMN)
+
+    @classmethod
+    def open(cls, processed_dir):
+        """Open a query API over the processed directory, refreshing the cache if stale"""
+        return cls(open_trip_cache(processed_dir))
+
+    def _offset_at(self, seconds):
+        """First row starting at or after the given unix time"""
+        if self.first_day is None:
+            return 0
+        num_days = len(self.day_offsets) - 1
+        day = seconds // SECONDS_PER_DAY - self.first_day
+        if day < 0:
+            return int(self.day_offsets[0])
+        if day >= num_days:
+            return int(self.day_offsets[-1])
+        # Narrow to one day with the index, then binary search inside it
+        lo, hi = int(self.day_offsets[day]), int(self.day_offsets[day + 1])
+        return lo + int(np.searchsorted(self.starts[lo:hi], seconds, side='left'))
+
+    def row_range(self, start, end):
+        """
+        Row slice of trips starting in [start, end)
+
+        :param start: Inclusive start (anything pd.Timestamp accepts)
+        :param end: Exclusive end
+        :return: slice into the cached columns
+        """
+        return slice(self._offset_at(_to_seconds(start)), self._offset_at(_to_seconds(end)))
+
+    def trips_between(self, start, end, columns=None):
+        """
+        Trips starting in [start, end)
+
+        :param start: Inclusive start (anything pd.Timestamp accepts)
+        :param end: Exclusive end
+        :param columns: Columns to read (defaults to all cached columns)
+        :return: pandas DataFrame
+        """
+        return self.cache.to_frame(columns=columns, rows=self.row_range(start, end))
+
+    def count_between(self, start, end):
+        """Number of trips starting in [start, end), without reading any rows"""
+        rows = self.row_range(start, end)
+        return rows.stop - rows.start
+
+    def daily_counts(self, start, end):
+        """
+        Trips per day for days in [start, end), read straight from the index
+
+        :param start: First day (inclusive)
+        :param end: Last day (exclusive)
+        :return: pandas Series of trip counts indexed by date
+        """
+        days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end), inclusive='left', freq='D')
+        if self.first_day is None or days.empty:
+            return pd.Series(0, index=days.date, name='total_trips', dtype=np.int64)
+
+        day_numbers = days.asi8 // (SECONDS_PER_DAY * 1_000_000_000) - self.first_day
+        num_days = len(self.day_offsets) - 1
+        lo = np.clip(day_numbers, 0, num_days)
+        hi = np.clip(day_numbers + 1, 0, num_days)
+        counts = np.asarray(self.day_offsets)[hi] - np.asarray(self.day_offsets)[lo]
+        return pd.Series(counts, index=days.date, name='total_trips')
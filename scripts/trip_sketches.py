@@ -0,0 +1,287 @@
+# Streaming approximate statistics for the trip summary report
+
+import os
+import pickle
+import numpy as np
+import pandas as pd
+
+# Categorical columns summarized with distinct counts and top values
+SUMMARY_COLUMNS = ['bike_id', 'start_station_id', 'end_station_id']
+
+# Name column kept alongside each station id for the top stations report
+STATION_NAME_COLUMNS = {
+    'start_station_id': 'start_station_name',
+    'end_station_id': 'end_station_name',
+}
+
+
+def hash_values(values):
+    """
+    Hash values to uint64 deterministically across processes and runs
+
+    :param values: array-like of values (compared by their string form)
+    :return: numpy uint64 array
+    """
+    values = np.asarray(pd.Series(values).astype(str), dtype=object)
+    return pd.util.hash_array(values)
+
+
+class HyperLogLog:
+    def __init__(self, precision=14):
+        """
+        Approximate distinct counter (~0.8% standard error at precision 14)
+
+        :param precision: Number of index bits; uses 2**precision registers
+        """
+        self.precision = precision
+        self.registers = np.zeros(1 << precision, dtype=np.uint8)
+
+    def update_hashes(self, hashes):
+        if len(hashes) == 0:
+            return
+        rest_bits = 64 - self.precision
+        idx = (hashes >> np.uint64(rest_bits)).astype(np.int64)
+        rest = hashes & np.uint64((1 << rest_bits) - 1)
+        # frexp gives the exact bit length, since rest fits in a float64 mantissa
+        _, bit_length = np.frexp(rest.astype(np.float64))
+        rank = (rest_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, idx, rank)
+
+    def update(self, values):
+        self.update_hashes(hash_values(values))
+
+    def merge(self, other):
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.ldexp(1.0, -self.registers.astype(np.int64)))
+        zeros = np.count_nonzero(self.registers == 0)
+        # Linear counting is more accurate for small cardinalities
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * np.log(m / zeros)
+        return int(round(estimate))
+
+
+class CountMinTopK:
+    def __init__(self, k=15, width=1 << 14, depth=4, capacity=None):
+        """
+        Count-min sketch with a bounded set of heavy-hitter candidates
+
+        :param k: Number of top values reported
+        :param width: Counters per row of the sketch
+        :param depth: Number of hash rows
+        :param capacity: Candidates tracked (defaults to 4 * k)
+        """
+        self.k = k
+        self.width = width
+        self.depth = depth
+        self.capacity = capacity or 4 * k
+        self.table = np.zeros((depth, width), dtype=np.int64)
+        self.candidates = {}
+
+    def _indexes(self, hashes):
+        # Double hashing derives every row index from one 64-bit hash
+        low = hashes & np.uint64(0xFFFFFFFF)
+        high = hashes >> np.uint64(32)
+        return [((low + np.uint64(row) * high) % np.uint64(self.width)).astype(np.int64)
+                for row in range(self.depth)]
+
+    def estimate(self, values):
+        if len(values) == 0:
+            return np.zeros(0, dtype=np.int64)
+        indexes = self._indexes(hash_values(values))
+        return np.min([self.table[row, idx] for row, idx in enumerate(indexes)], axis=0)
+
+    def _refresh_candidates(self, new_values):
+        values = list(self.candidates) + [v for v in new_values if v not in self.candidates]
+        counts = self.estimate(values)
+        order = np.argsort(-counts, kind='stable')[:self.capacity]
+        self.candidates = {values[i]: int(counts[i]) for i in order}
+
+    def update(self, values):
+        counts = pd.Series(values).dropna().astype(str).value_counts()
+        if counts.empty:
+            return
+        indexes = self._indexes(hash_values(counts.index))
+        for row, idx in enumerate(indexes):
+            np.add.at(self.table[row], idx, counts.to_numpy())
+        self._refresh_candidates(counts.index[:self.capacity])
+
+    def merge(self, other):
+        if self.table.shape != other.table.shape:
+            raise ValueError("Cannot merge count-min sketches with different dimensions")
+        self.table += other.table
+        self._refresh_candidates(list(other.candidates))
+        return self
+
+    def top(self):
+        """Return [(value, estimated_count)] for the k heaviest values"""
+        return sorted(self.candidates.items(), key=lambda item: -item[1])[:self.k]
+
+
+class RunningStats:
+    def __init__(self):
+        """Count, sum, min and max of a numeric stream"""
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.asarray(values, dtype=np.float64)
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+
+    def merge(self, other):
+        self.count += other.count
+        self.total += other.total
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else np.nan
+
+
+def _timestamps_to_float(values):
+    timestamps = pd.to_datetime(values, errors='coerce')
+    ns = timestamps.to_numpy(dtype='datetime64[ns]').astype(np.int64).astype(np.float64)
+    ns[timestamps.isna().to_numpy()] = np.nan
+    return ns
+
+
+class TripSummarySketch:
+    def __init__(self, top_k=15, hll_precision=14, cms_width=1 << 14, cms_depth=4):
+        """
+        Constant-memory summary of the cleaned trips, updated chunk by chunk
+
+        Every component is mergeable, so sketches built by separate worker
+        processes or earlier incremental runs can be combined with merge().
+
+        :param top_k: Number of top values reported per column
+        :param hll_precision: HyperLogLog precision for distinct counts
+        :param cms_width: Count-min sketch width for top values
+        :param cms_depth: Count-min sketch depth for top values
+        """
+        self.distinct = {col: HyperLogLog(hll_precision) for col in SUMMARY_COLUMNS}
+        self.top = {col: CountMinTopK(top_k, cms_width, cms_depth) for col in SUMMARY_COLUMNS}
+        self.duration = RunningStats()
+        self.start_dates = RunningStats()
+        self.end_dates = RunningStats()
+        self.station_names = {col: {} for col in STATION_NAME_COLUMNS}
+        self.rows = 0
+
+    def update(self, df):
+        """
+        Fold a chunk of cleaned trips into the sketch
+
+        :param df: DataFrame chunk with the cleaned trip columns
+        """
+        self.rows += len(df)
+        for col in SUMMARY_COLUMNS:
+            if col in df.columns:
+                values = df[col].dropna()
+                self.distinct[col].update(values)
+                self.top[col].update(values)
+
+        if 'duration_seconds' in df.columns:
+            self.duration.update(df['duration_seconds'])
+        if 'start_date' in df.columns:
+            self.start_dates.update(_timestamps_to_float(df['start_date']))
+        if 'end_date' in df.columns:
+            self.end_dates.update(_timestamps_to_float(df['end_date']))
+
+        for id_col, name_col in STATION_NAME_COLUMNS.items():
+            if id_col in df.columns and name_col in df.columns:
+                self._update_station_names(id_col, df[[id_col, name_col]])
+
+    def _update_station_names(self, id_col, df):
+        # Only keep names for current heavy-hitter candidates to stay bounded
+        candidates = self.top[id_col].candidates
+        names = self.station_names[id_col]
+        missing = [station for station in candidates if station not in names]
+        if missing:
+            ids = df[id_col].astype(str)
+            found = df[ids.isin(missing)].drop_duplicates(id_col)
+            for station, name in zip(found[id_col].astype(str), found.iloc[:, 1]):
+                names[station] = name
+        self.station_names[id_col] = {station: names[station] for station in candidates if station in names}
+
+    def merge(self, other):
+        """Combine another sketch (e.g. from another worker or run) into this one"""
+        for col in SUMMARY_COLUMNS:
+            self.distinct[col].merge(other.distinct[col])
+            self.top[col].merge(other.top[col])
+        self.duration.merge(other.duration)
+        self.start_dates.merge(other.start_dates)
+        self.end_dates.merge(other.end_dates)
+        for col in STATION_NAME_COLUMNS:
+            names = {**other.station_names[col], **self.station_names[col]}
+            self.station_names[col] = {station: names[station]
+                                       for station in self.top[col].candidates if station in names}
+        self.rows += other.rows
+        return self
+
+    def save(self, path):
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        """Load a saved sketch, or return an empty one if none exists yet"""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'rb') as f:
+            return pickle.load(f)
+
+    def print_summary(self):
+        """Print the data summary and station consistency report"""
+        print("\nData Summary:")
+        print(f"Rows summarized: {self.rows:,}")
+
+        if self.start_dates.count and self.end_dates.count:
+            print(f"Date range: {pd.Timestamp(int(self.start_dates.min))} to {pd.Timestamp(int(self.end_dates.max))}")
+
+        if self.duration.count:
+            print(f"Average trip duration: {self.duration.mean/60:.2f} minutes")
+            print(f"Duration range: {self.duration.min/60:.2f} to {self.duration.max/60:.2f} minutes")
+
+        for col in SUMMARY_COLUMNS:
+            print(f"Unique {col} (approx.): {self.distinct[col].count():,}")
+            top_values = self.top[col].top()
+            print(f"Top {len(top_values)} {col}:")
+            for val, count in top_values:
+                print(f"  {val}: ~{count:,} trips")
+
+        ## Check Station Consistency
+        start_hll = self.distinct['start_station_id']
+        end_hll = self.distinct['end_station_id']
+        union_hll = HyperLogLog(start_hll.precision).merge(start_hll).merge(end_hll)
+        start_stations = start_hll.count()
+        end_stations = end_hll.count()
+        all_stations = union_hll.count()
+        print(f"\nUnique start stations (approx.): {start_stations:,}")
+        print(f"Unique end stations (approx.): {end_stations:,}")
+        # |A - B| = |A ∪ B| - |B|, estimated from the merged sketch
+        print(f"Stations that only appear as start stations (approx.): {max(all_stations - end_stations, 0)}")
+        print(f"Stations that only appear as end stations (approx.): {max(all_stations - start_stations, 0)}")
+
+        for col, label in [('start_station_id', 'start'), ('end_station_id', 'end')]:
+            print(f"\nTop 5 {label} stations:")
+            for station, count in self.top[col].top()[:5]:
+                station_name = self.station_names[col].get(station, 'unknown')
+                print(f"  {station} ({station_name}): ~{count:,} trips")
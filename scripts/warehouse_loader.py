@@ -0,0 +1,471 @@
+# Load processed trips into the warehouse, partitioned by trip_date
+
+import os
+import csv
+import glob
+import json
+import shutil
+import hashlib
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+logger = logging.getLogger(__name__)
+
+# Upload chunk size for resumable transfers (GCS requires a multiple of 256 KB)
+UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Object holding the checksum of every partition that has been loaded
+MANIFEST_NAME = '_load_manifest.json'
+
+# Kept in the partition directory: how much of the CSV is already partitioned,
+# and the checksum of every partition written so far
+PARTITION_STATE_NAME = '_partition_state.json'
+
+# Fixed schema for every part file, so all partitions load into one table
+PARTITION_SCHEMA = pa.schema([
+    ('source_file', pa.string()),
+    ('rental_id', pa.int64()),
+    ('start_date', pa.timestamp('us')),
+    ('end_date', pa.timestamp('us')),
+    ('start_station_id', pa.string()),
+    ('start_station_name', pa.string()),
+    ('end_station_id', pa.string()),
+    ('end_station_name', pa.string()),
+    ('bike_id', pa.string()),
+    ('duration_seconds', pa.float64()),
+    ('day_of_week', pa.string()),
+    ('hour_of_day', pa.int64()),
+    ('month', pa.int64()),
+    ('year', pa.int64()),
+    ('month_name', pa.string()),
+    ('trip_date', pa.date32()),
+])
+
+# Read as text so ids keep their CSV form (e.g. '123', never '123.0')
+STRING_COLUMNS = [field.name for field in PARTITION_SCHEMA if field.type == pa.string()]
+DATE_COLUMNS = ['start_date', 'end_date']
+INTEGER_COLUMNS = [field.name for field in PARTITION_SCHEMA if field.type == pa.int64()]
+
+
+def file_md5(path, chunk_size=UPLOAD_CHUNK_SIZE):
+    """Compute the hex md5 of a file without reading it all into memory"""
+    digest = hashlib.md5()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _load_partition_state(partition_dir):
+    path = os.path.join(partition_dir, PARTITION_STATE_NAME)
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def _save_partition_state(partition_dir, state):
+    path = os.path.join(partition_dir, PARTITION_STATE_NAME)
+    with open(path + '.tmp', 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(path + '.tmp', path)
+
+
+def _tail_md5(path, offset, size=64 * 1024):
+    # Fingerprint of the bytes just before offset, to notice a replaced CSV
+    with open(path, 'rb') as f:
+        f.seek(max(offset - size, 0))
+        return hashlib.md5(f.read(min(offset, size))).hexdigest()
+
+
+def write_partitions(clean_csv_path, partition_dir, chunksize=1_000_000):
+    """
+    Convert new rows of the cleaned trips CSV into Parquet files partitioned by trip_date
+
+    clean_trips.csv only ever grows at the end, so the byte offset already
+    partitioned is recorded in the partition directory and each call only
+    reads the rows appended since. Each CSV chunk writes one part file per
+    date it touches, using the Hive-style layout
+    `trip_date=YYYY-MM-DD/part-RRRRR-NNNNN.parquet` (R = write run, N = chunk).
+    Everything is rewritten if the already partitioned part of the CSV
+    appears to have changed (new header, smaller size, different tail).
+
+    :param clean_csv_path: Path to clean_trips.csv
+    :param partition_dir: Output directory for the partitioned Parquet files
+    :param chunksize: Number of CSV rows read per chunk
+    :return: Sorted list of partition dates written to in this call
+    """
+    with open(clean_csv_path, 'rb') as f:
+        header = f.readline().decode().rstrip('\r\n')
+
+    state = _load_partition_state(partition_dir) if os.path.exists(partition_dir) else None
+    if (state is None
+            or state['source'] != os.path.abspath(clean_csv_path)
+            or state['header'] != header
+            or os.path.getsize(clean_csv_path) < state['byte_offset']
+            or _tail_md5(clean_csv_path, state['byte_offset']) != state['tail_md5']):
+        # Rebuild from scratch so stale part files never linger in a partition
+        if os.path.exists(partition_dir):
+            shutil.rmtree(partition_dir)
+        os.makedirs(partition_dir)
+        state = {
+            'source': os.path.abspath(clean_csv_path),
+            'header': header,
+            'byte_offset': 0,
+            'tail_md5': _tail_md5(clean_csv_path, 0),
+            'rows': 0,
+            'runs': 0,
+            'checksums': {},
+        }
+
+    if os.path.getsize(clean_csv_path) == state['byte_offset']:
+        logger.info(f"No new rows in {clean_csv_path} since the last partition write")
+        return []
+
+    # Part files left by an interrupted write of this run are replaced below
+    run = state['runs']
+    for stale_path in glob.glob(os.path.join(partition_dir, 'trip_date=*', f'part-{run:05d}-*.parquet')):
+        os.remove(stale_path)
+
+    partition_dates = set()
+    rows = 0
+    with open(clean_csv_path, 'rb') as f:
+        read_options = {}
+        if state['byte_offset']:
+            # Start at the first byte not yet partitioned; the header is only at the top
+            f.seek(state['byte_offset'])
+            read_options = {'header': None, 'names': next(csv.reader([header]))}
+        reader = pd.read_csv(
+            f,
+            chunksize=chunksize,
+            dtype={col: str for col in STRING_COLUMNS},
+            parse_dates=DATE_COLUMNS,
+            low_memory=False,
+            **read_options
+        )
+        for chunk_num, chunk in enumerate(reader):
+            rows += len(chunk)
+            for col in DATE_COLUMNS:
+                chunk[col] = pd.to_datetime(chunk[col], errors='coerce')
+            for col in INTEGER_COLUMNS:
+                if col in chunk.columns:
+                    chunk[col] = pd.to_numeric(chunk[col], errors='coerce').astype('Int64')
+            chunk['trip_date'] = chunk['start_date'].dt.date
+            chunk = chunk[chunk['trip_date'].notna()]
+
+            for trip_date, day_df in chunk.groupby('trip_date'):
+                date_dir = os.path.join(partition_dir, f'trip_date={trip_date.isoformat()}')
+                os.makedirs(date_dir, exist_ok=True)
+                # Missing columns become nulls and every file shares the same types
+                day_df = day_df.reindex(columns=PARTITION_SCHEMA.names)
+                table = pa.Table.from_pandas(day_df, schema=PARTITION_SCHEMA, preserve_index=False)
+                pq.write_table(table, os.path.join(date_dir, f'part-{run:05d}-{chunk_num:05d}.parquet'))
+                partition_dates.add(trip_date.isoformat())
+        byte_offset = f.tell()
+
+    # Only partitions that gained part files need their checksum recomputed
+    for partition_date in partition_dates:
+        date_dir = os.path.join(partition_dir, f'trip_date={partition_date}')
+        state['checksums'][partition_date] = partition_checksum(date_dir)
+    state.update(byte_offset=byte_offset, tail_md5=_tail_md5(clean_csv_path, byte_offset),
+                 rows=state['rows'] + rows, runs=run + 1)
+    _save_partition_state(partition_dir, state)
+
+    logger.info(f"Partitioned {rows:,} new rows into {len(partition_dates)} trip_date partitions in {partition_dir}")
+    return sorted(partition_dates)
+
+
+def partition_checksum(date_dir):
+    """Combine the md5 of every part file in a partition into one checksum"""
+    digest = hashlib.md5()
+    for name in sorted(os.listdir(date_dir)):
+        if name.endswith('.parquet'):
+            digest.update(name.encode())
+            digest.update(file_md5(os.path.join(date_dir, name)).encode())
+    return digest.hexdigest()
+
+
+def partition_checksums(partition_dir):
+    """
+    Checksum of every partition, as recorded by write_partitions
+
+    Falls back to hashing every part file for directories written without
+    a partition state file.
+
+    :return: dict of {partition_date: checksum}
+    """
+    state = _load_partition_state(partition_dir)
+    if state is not None:
+        return dict(state['checksums'])
+
+    checksums = {}
+    for name in sorted(os.listdir(partition_dir)):
+        if name.startswith('trip_date='):
+            checksums[name.split('=', 1)[1]] = partition_checksum(os.path.join(partition_dir, name))
+    return checksums
+
+
+class LocalObjectStore:
+    def __init__(self, root):
+        """
+        Directory-backed stand-in for a GCS bucket
+
+        :param root: Directory acting as the bucket
+        """
+        self.root = root
+        os.makedirs(root, exist_ok=True)
+
+    def uri(self, key):
+        return os.path.join(self.root, key)
+
+    def upload(self, local_path, key):
+        """
+        Copy a file in chunks, resuming from a partial upload if one exists
+
+        The partial upload records the size and md5 of its source, and is only
+        resumed when they match the file being uploaded now.
+        """
+        dest = self.uri(key)
+        partial = dest + '.partial'
+        partial_info_path = partial + '.json'
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+
+        source_info = {'size': os.path.getsize(local_path), 'md5': file_md5(local_path)}
+        previous_info = None
+        if os.path.exists(partial_info_path):
+            with open(partial_info_path) as f:
+                previous_info = json.load(f)
+        if previous_info != source_info and os.path.exists(partial):
+            os.remove(partial)
+        with open(partial_info_path, 'w') as f:
+            json.dump(source_info, f)
+
+        offset = os.path.getsize(partial) if os.path.exists(partial) else 0
+        with open(local_path, 'rb') as src, open(partial, 'ab') as out:
+            src.seek(offset)
+            for block in iter(lambda: src.read(UPLOAD_CHUNK_SIZE), b''):
+                out.write(block)
+
+        if file_md5(partial) != source_info['md5']:
+            os.remove(partial)
+            os.remove(partial_info_path)
+            raise IOError(f"Upload of {local_path} to {dest} failed checksum verification")
+        os.replace(partial, dest)
+        os.remove(partial_info_path)
+        return self.uri(key)
+
+    def read_text(self, key):
+        path = self.uri(key)
+        if not os.path.exists(path):
+            return None
+        with open(path) as f:
+            return f.read()
+
+    def write_text(self, key, text):
+        path = self.uri(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as f:
+            f.write(text)
+
+
+class GCSObjectStore:
+    def __init__(self, project_id, bucket_name):
+        """
+        Google Cloud Storage bucket used as the data lake
+
+        :param project_id: Google Cloud Project ID
+        :param bucket_name: Name of the GCS bucket
+        """
+        from google.cloud import storage
+
+        self.client = storage.Client(project=project_id)
+        self.bucket = self.client.bucket(bucket_name)
+        self.bucket_name = bucket_name
+
+    def uri(self, key):
+        return f'gs://{self.bucket_name}/{key}'
+
+    def upload(self, local_path, key):
+        """
+        Upload a file with a chunked, resumable transfer
+        """
+        # Setting chunk_size makes the client use a resumable upload session
+        blob = self.bucket.blob(key, chunk_size=UPLOAD_CHUNK_SIZE)
+        blob.upload_from_filename(local_path)
+        return self.uri(key)
+
+    def read_text(self, key):
+        blob = self.bucket.blob(key)
+        if not blob.exists():
+            return None
+        return blob.download_as_text()
+
+    def write_text(self, key, text):
+        self.bucket.blob(key).upload_from_string(text, content_type='application/json')
+
+
+class LocalWarehouse:
+    def __init__(self, root, table='trips'):
+        """
+        Directory-backed stand-in for the BigQuery trips table
+
+        :param root: Directory acting as the dataset
+        :param table: Name of the partitioned trips table
+        """
+        self.table_dir = os.path.join(root, table)
+        os.makedirs(self.table_dir, exist_ok=True)
+
+    def start_load(self, partition_date, uris):
+        """
+        Replace one trip_date partition with the given files
+        """
+        date_dir = os.path.join(self.table_dir, f'trip_date={partition_date}')
+        if os.path.exists(date_dir):
+            shutil.rmtree(date_dir)
+        os.makedirs(date_dir)
+        for uri in uris:
+            shutil.copyfile(uri, os.path.join(date_dir, os.path.basename(uri)))
+        return partition_date
+
+    def wait(self, job):
+        return job
+
+
+class BigQueryWarehouse:
+    def __init__(self, project_id, dataset, table='trips'):
+        """
+        BigQuery table partitioned by trip_date
+
+        :param project_id: Google Cloud Project ID
+        :param dataset: Dataset containing the trips table
+        :param table: Name of the partitioned trips table
+        """
+        from google.cloud import bigquery
+
+        self.bigquery = bigquery
+        self.client = bigquery.Client(project=project_id)
+        self.table_id = f'{project_id}.{dataset}.{table}'
+
+    def start_load(self, partition_date, uris):
+        """
+        Submit a load job that overwrites a single trip_date partition
+        """
+        job_config = self.bigquery.LoadJobConfig(
+            source_format=self.bigquery.SourceFormat.PARQUET,
+            write_disposition=self.bigquery.WriteDisposition.WRITE_TRUNCATE,
+            time_partitioning=self.bigquery.TimePartitioning(field='trip_date')
+        )
+        # Partition decorator limits WRITE_TRUNCATE to this day only
+        destination = f"{self.table_id}${partition_date.replace('-', '')}"
+        return self.client.load_table_from_uri(uris, destination, job_config=job_config)
+
+    def wait(self, job):
+        return job.result()
+
+
+class WarehouseLoader:
+    def __init__(self, object_store, warehouse, prefix='trips', max_workers=8, batch_size=20):
+        """
+        Upload partitioned Parquet files and load them into the warehouse
+
+        :param object_store: LocalObjectStore or GCSObjectStore
+        :param warehouse: LocalWarehouse or BigQueryWarehouse
+        :param prefix: Key prefix for uploaded files in the object store
+        :param max_workers: Number of parallel uploads
+        :param batch_size: Number of load jobs submitted before waiting
+        """
+        self.object_store = object_store
+        self.warehouse = warehouse
+        self.prefix = prefix
+        self.max_workers = max_workers
+        self.batch_size = batch_size
+
+    def _manifest_key(self):
+        return f'{self.prefix}/{MANIFEST_NAME}'
+
+    def load_manifest(self):
+        """Return {partition_date: checksum} for partitions already loaded"""
+        text = self.object_store.read_text(self._manifest_key())
+        return json.loads(text) if text else {}
+
+    def _save_manifest(self, manifest):
+        self.object_store.write_text(self._manifest_key(), json.dumps(manifest, indent=2, sort_keys=True))
+
+    def pending_partitions(self, partition_dir):
+        """
+        Find partitions whose checksum differs from the last successful load
+
+        :param partition_dir: Directory written by write_partitions
+        :return: dict of {partition_date: checksum}
+        """
+        manifest = self.load_manifest()
+        return {partition_date: checksum
+                for partition_date, checksum in sorted(partition_checksums(partition_dir).items())
+                if manifest.get(partition_date) != checksum}
+
+    def _upload_partition(self, partition_dir, partition_date):
+        date_dir = os.path.join(partition_dir, f'trip_date={partition_date}')
+        uris = []
+        for name in sorted(os.listdir(date_dir)):
+            if name.endswith('.parquet'):
+                key = f'{self.prefix}/trip_date={partition_date}/{name}'
+                uris.append(self.object_store.upload(os.path.join(date_dir, name), key))
+        return partition_date, uris
+
+    def load(self, partition_dir):
+        """
+        Upload and load every changed partition, skipping unchanged ones
+
+        :param partition_dir: Directory written by write_partitions
+        :return: List of partition dates that were loaded
+        """
+        pending = self.pending_partitions(partition_dir)
+        if not pending:
+            logger.info("All partitions already loaded, nothing to do")
+            return []
+
+        logger.info(f"Uploading {len(pending)} changed partitions with {self.max_workers} workers")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            uploaded = list(executor.map(
+                lambda partition_date: self._upload_partition(partition_dir, partition_date),
+                pending
+            ))
+
+        manifest = self.load_manifest()
+        loaded = []
+        for start in range(0, len(uploaded), self.batch_size):
+            batch = uploaded[start:start + self.batch_size]
+            jobs = [(partition_date, self.warehouse.start_load(partition_date, uris))
+                    for partition_date, uris in batch]
+            for partition_date, job in jobs:
+                self.warehouse.wait(job)
+                manifest[partition_date] = pending[partition_date]
+                loaded.append(partition_date)
+            # Record progress after every batch so an interrupted run resumes here
+            self._save_manifest(manifest)
+            logger.info(f"Loaded {len(loaded)} of {len(uploaded)} partitions")
+
+        return loaded
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    clean_csv_path = os.path.join('bicycle_data', 'processed', 'clean_trips.csv')
+    partition_dir = os.path.join('bicycle_data', 'processed', 'partitions')
+    write_partitions(clean_csv_path, partition_dir)
+
+    # Local stand-in; swap for GCSObjectStore/BigQueryWarehouse to load into GCP
+    loader = WarehouseLoader(
+        object_store=LocalObjectStore(os.path.join('bicycle_data', 'object_store')),
+        warehouse=LocalWarehouse(os.path.join('bicycle_data', 'warehouse'))
+    )
+    loader.load(partition_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+from trip_dedup import TripDeduplicator
+
+
+def trips(rental_ids):
+    return pd.DataFrame({'rental_id': rental_ids, 'bike_id': [f'bike-{i}' for i in rental_ids]})
+
+
+def test_duplicates_within_and_across_calls_are_dropped(tmp_path):
+    deduplicator = TripDeduplicator(tmp_path / 'keys', num_partitions=4)
+
+    first = deduplicator.filter_new(trips([1, 2, 2, 3]))
+    second = deduplicator.filter_new(trips([3, 4, 1, 5]))
+
+    assert first['rental_id'].tolist() == [1, 2, 3]
+    assert second['rental_id'].tolist() == [4, 5]
+
+
+def test_committed_keys_are_dropped_in_later_runs(tmp_path):
+    deduplicator = TripDeduplicator(tmp_path / 'keys', num_partitions=4)
+    deduplicator.filter_new(trips(list(range(100))))
+    assert deduplicator.commit() == 100
+
+    later_run = TripDeduplicator(tmp_path / 'keys', num_partitions=4)
+    new = later_run.filter_new(trips(list(range(90, 110))))
+
+    assert later_run.seen_count() == 100
+    assert new['rental_id'].tolist() == list(range(100, 110))
+
+
+def test_trips_without_rental_id_use_composite_key(tmp_path):
+    df = pd.DataFrame({
+        'rental_id': [np.nan, np.nan, np.nan],
+        'start_date': ['2023-01-01 08:00', '2023-01-01 08:00', '2023-01-01 09:00'],
+        'end_date': ['2023-01-01 08:20', '2023-01-01 08:20', '2023-01-01 09:20'],
+        'start_station_id': ['1', '1', '1'],
+        'end_station_id': ['2', '2', '2'],
+        'bike_id': ['7', '7', '7'],
+    })
+    deduplicator = TripDeduplicator(tmp_path / 'keys', num_partitions=4)
+
+    assert len(deduplicator.filter_new(df)) == 2
+    deduplicator.commit()
+    assert len(TripDeduplicator(tmp_path / 'keys', num_partitions=4).filter_new(df)) == 0
+
+
+def test_interrupted_run_is_rolled_back(tmp_path):
+    output_path = tmp_path / 'clean_trips.csv'
+    deduplicator = TripDeduplicator(tmp_path / 'keys', num_partitions=4)
+    deduplicator.begin(output_path)
+    deduplicator.filter_new(trips([1, 2])).to_csv(output_path, index=False)
+    deduplicator.commit()
+    committed_size = os.path.getsize(output_path)
+
+    # Append a second run but stop before commit()
+    deduplicator.begin(output_path)
+    deduplicator.filter_new(trips([3, 4])).to_csv(output_path, mode='a', header=False, index=False)
+
+    recovered = TripDeduplicator(tmp_path / 'keys', num_partitions=4)
+
+    assert os.path.getsize(output_path) == committed_size
+    assert recovered.seen_count() == 2
+    assert recovered.filter_new(trips([3, 4]))['rental_id'].tolist() == [3, 4]
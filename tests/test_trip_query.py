@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trip_cache import TripCache
+from trip_query import TripQuery
+
+
+@pytest.fixture(scope='module')
+def trips(tmp_path_factory):
+    rng = np.random.default_rng(1)
+    rows = 5_000
+    start = pd.Timestamp('2023-03-01') + pd.to_timedelta(rng.integers(0, 20 * 86_400, rows), unit='s')
+    df = pd.DataFrame({
+        'rental_id': np.arange(rows),
+        'start_date': start.strftime('%Y-%m-%d %H:%M:%S'),
+        'bike_id': rng.integers(0, 50, rows).astype(str),
+    })
+    # Some trips have no usable start time
+    df.loc[1::41, 'start_date'] = np.nan
+    df.loc[2::67, 'start_date'] = 'not a date'
+
+    path = tmp_path_factory.mktemp('processed') / 'clean_trips.csv'
+    df.to_csv(path, index=False)
+    df['start_date'] = pd.to_datetime(df['start_date'], errors='coerce')
+    return df, path
+
+
+@pytest.fixture(scope='module')
+def query(trips, tmp_path_factory):
+    _, path = trips
+    cache = TripCache(str(tmp_path_factory.mktemp('cache') / 'trip_cache'), [str(path)])
+    # A small chunksize makes the build sort across many chunks
+    return TripQuery(cache.build(chunksize=700))
+
+
+RANGES = [
+    ('2023-03-05', '2023-03-06'),
+    ('2023-03-04 13:30', '2023-03-09 07:15:10'),
+    ('2023-02-01', '2023-03-03'),
+    ('2023-03-18 12:00', '2023-04-15'),
+    ('2023-01-01', '2024-01-01'),
+    ('2022-01-01', '2022-02-01'),
+    ('2023-05-01', '2023-06-01'),
+    ('2023-03-10', '2023-03-10'),
+]
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_trips_between_matches_brute_force(trips, query, start, end):
+    df, _ = trips
+    expected = df[(df['start_date'] >= start) & (df['start_date'] < end)]
+
+    result = query.trips_between(start, end, columns=['rental_id', 'start_date'])
+
+    assert query.count_between(start, end) == len(expected)
+    assert sorted(result['rental_id']) == sorted(expected['rental_id'])
+    assert result['start_date'].is_monotonic_increasing
+
+
+@pytest.mark.parametrize('start, end', RANGES)
+def test_daily_counts_match_brute_force(trips, query, start, end):
+    df, _ = trips
+    days = pd.date_range(pd.Timestamp(start).normalize(), pd.Timestamp(end), inclusive='left', freq='D')
+    expected = df['start_date'].dt.normalize().value_counts().reindex(days, fill_value=0)
+
+    result = query.daily_counts(start, end)
+
+    assert list(result.index) == list(days.date)
+    assert result.tolist() == expected.tolist()
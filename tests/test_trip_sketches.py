@@ -0,0 +1,53 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from trip_sketches import HyperLogLog, TripSummarySketch
+
+
+def station_trips(rng, rows, num_stations):
+    # Skewed station popularity, like the real network
+    weights = 1.0 / np.arange(1, num_stations + 1)
+    stations = rng.choice(num_stations, size=rows, p=weights / weights.sum())
+    return pd.DataFrame({
+        'bike_id': rng.integers(0, 5_000, rows).astype(str),
+        'start_station_id': stations.astype(str),
+        'end_station_id': rng.integers(0, num_stations, rows).astype(str),
+        'duration_seconds': rng.integers(60, 3_600, rows).astype(float),
+    })
+
+
+def test_merged_distinct_count_is_close_to_exact():
+    left, right = HyperLogLog(), HyperLogLog()
+    left.update(np.arange(0, 60_000))
+    right.update(np.arange(40_000, 100_000))
+
+    assert abs(left.merge(right).count() - 100_000) / 100_000 < 0.03
+
+
+def test_merged_sketch_matches_exact_counts():
+    rng = np.random.default_rng(0)
+    chunks = [station_trips(rng, 20_000, 800) for _ in range(3)]
+    exact = pd.concat(chunks, ignore_index=True)
+
+    # One sketch per chunk, as separate runs or workers would build them
+    merged = TripSummarySketch()
+    for chunk in chunks:
+        sketch = TripSummarySketch()
+        sketch.update(chunk)
+        merged.merge(sketch)
+
+    assert merged.rows == len(exact)
+    assert merged.duration.count == len(exact)
+    assert merged.duration.mean == pytest.approx(exact['duration_seconds'].mean())
+
+    for col in ['bike_id', 'start_station_id', 'end_station_id']:
+        true_distinct = exact[col].nunique()
+        assert abs(merged.distinct[col].count() - true_distinct) / true_distinct < 0.03
+
+    exact_counts = exact['start_station_id'].value_counts()
+    top = merged.top['start_station_id'].top()
+    assert [station for station, _ in top[:5]] == exact_counts.index[:5].tolist()
+    for station, estimate in top:
+        # Count-min never underestimates, and overestimates by little at this width
+        assert exact_counts[station] <= estimate <= exact_counts[station] * 1.02